@@ -1,61 +1,154 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
+from flask.json.provider import JSONProvider
 from crunchyroll_checker import CrunchyrollChecker
+from concurrent.futures import ThreadPoolExecutor
+import atexit
 import logging
+import orjson
 import os
-from threading import Lock
+import queue
+import re
+import threading
 import time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class ORJSONProvider(JSONProvider):
+    """JSON provider backed by orjson for faster encoding/decoding"""
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
-checker_lock = Lock()
+app.json = ORJSONProvider(app)
+app.config['MAX_CONTENT_LENGTH'] = 8192
+
+# Legitimate payloads are well under 1 KB (single) / 2 KB (batch of 5)
+MAX_BODY_BYTES = 4096
+
+# Single-scan structural email check
+EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+def is_body_too_large():
+    """Reject oversized payloads before the body is read or parsed"""
+    return request.content_length and request.content_length > MAX_BODY_BYTES
+
+# Pool of reusable checker instances (one per concurrent request)
+checker_pool = queue.Queue()
+
+def acquire_checker():
+    """Get a checker from the pool, growing it if all are in use"""
+    try:
+        return checker_pool.get_nowait()
+    except queue.Empty:
+        return CrunchyrollChecker()
+
+def release_checker(checker):
+    """Return a checker to the pool for reuse"""
+    checker_pool.put(checker)
+
+@atexit.register
+def close_checker_pool():
+    """Close pooled sessions on interpreter shutdown"""
+    while True:
+        try:
+            checker_pool.get_nowait().close()
+        except queue.Empty:
+            break
 
-# Rate limiting storage (in-memory for simplicity)
-request_times = {}
+# Rate limiting storage (in-memory for simplicity): ip -> (tokens, last_refill),
+# sharded so concurrent requests don't all contend on one lock. Each shard is
+# [buckets, lock, next_sweep_ns]; the timestamp throttles eviction sweeps.
+_RATE_SHARDS = 16
+_RATE_SHARD_SWEEP_SIZE = 4096
+_RATE_SWEEP_INTERVAL_NS = 60 * 1_000_000_000
+rate_shards = [[{}, threading.Lock(), 0] for _ in range(_RATE_SHARDS)]
 
 def is_rate_limited(ip, max_requests=10, window_seconds=60):
-    """Simple rate limiting"""
-    current_time = time.time()
-    if ip not in request_times:
-        request_times[ip] = []
-    
-    # Remove old requests
-    request_times[ip] = [t for t in request_times[ip] if current_time - t < window_seconds]
-    
-    # Check if over limit
-    if len(request_times[ip]) >= max_requests:
-        return True
-    
-    # Add current request
-    request_times[ip].append(current_time)
-    return False
+    """Token-bucket rate limiting: O(1) per check, two ints per IP"""
+    now_ns = time.monotonic_ns()
+    window_ns = window_seconds * 1_000_000_000
+    # Fixed-point tokens scaled so one token == window_ns units; refill is
+    # then just elapsed_ns * max_requests, keeping everything in integers
+    capacity = max_requests * window_ns
+    shard = rate_shards[hash(ip) & (_RATE_SHARDS - 1)]
+    buckets, lock = shard[0], shard[1]
+    with lock:
+        # Opportunistically evict long-idle IPs once a shard grows large,
+        # but pay the full scan at most once per sweep interval
+        if len(buckets) > _RATE_SHARD_SWEEP_SIZE and now_ns >= shard[2]:
+            shard[2] = now_ns + _RATE_SWEEP_INTERVAL_NS
+            idle_cutoff = now_ns - 10 * window_ns
+            for key in [k for k, (_, last) in buckets.items() if last < idle_cutoff]:
+                del buckets[key]
+
+        tokens, last_refill = buckets.get(ip, (capacity, now_ns))
+
+        # Refill tokens for the time elapsed since the last check
+        tokens = min(capacity, tokens + (now_ns - last_refill) * max_requests)
+
+        if tokens < window_ns:
+            buckets[ip] = (tokens, now_ns)
+            return True
+
+        buckets[ip] = (tokens - window_ns, now_ns)
+        return False
+
+# Static response bodies serialized once at import instead of per request
+_HOME_BYTES = orjson.dumps({
+    'status': 'active',
+    'service': 'Crunchyroll Account Checker API',
+    'version': '1.0.0',
+    'endpoints': {
+        '/api/check': 'POST - Check single account',
+        '/api/batch-check': 'POST - Check multiple accounts (max 5)',
+        '/api/health': 'GET - Health check'
+    },
+    'usage': {
+        'single_check': 'Send POST with {"email": "email", "password": "password"}',
+        'batch_check': 'Send POST with {"accounts": ["email:pass", "email:pass"]}'
+    }
+})
+
+# Health responses only vary by timestamp, so splice it between cached halves
+_HEALTH_PREFIX = b'{"status":"healthy","timestamp":'
+_HEALTH_SUFFIX = b',"service":"Crunchyroll Checker API"}'
+
+_NOT_FOUND_BYTES = orjson.dumps({
+    'success': False,
+    'error': 'Endpoint not found',
+    'message': 'Check / for available endpoints'
+})
+
+_SERVER_ERROR_BYTES = orjson.dumps({
+    'success': False,
+    'error': 'Internal server error'
+})
+
+# A hammering client should cost as little as possible: 429s reuse one
+# pre-encoded minimal body instead of building and encoding a dict
+_RATE_LIMITED_BYTES = orjson.dumps({
+    'success': False,
+    'error': 'Rate limit exceeded'
+})
+
+def rate_limited_response(retry_after):
+    """Minimal pre-encoded 429 telling the client when to come back"""
+    return Response(_RATE_LIMITED_BYTES, status=429, mimetype='application/json',
+                    headers={'Retry-After': retry_after})
 
 @app.route('/')
 def home():
-    return jsonify({
-        'status': 'active',
-        'service': 'Crunchyroll Account Checker API',
-        'version': '1.0.0',
-        'endpoints': {
-            '/api/check': 'POST - Check single account',
-            '/api/batch-check': 'POST - Check multiple accounts (max 5)',
-            '/api/health': 'GET - Health check'
-        },
-        'usage': {
-            'single_check': 'Send POST with {"email": "email", "password": "password"}',
-            'batch_check': 'Send POST with {"accounts": ["email:pass", "email:pass"]}'
-        }
-    })
+    return Response(_HOME_BYTES, mimetype='application/json')
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({
-        'status': 'healthy',
-        'timestamp': time.time(),
-        'service': 'Crunchyroll Checker API'
-    })
+    body = _HEALTH_PREFIX + repr(time.time()).encode() + _HEALTH_SUFFIX
+    return Response(body, mimetype='application/json')
 
 @app.route('/api/check', methods=['POST'])
 def check_account():
@@ -66,15 +159,18 @@ def check_account():
     
     # Rate limiting
     if is_rate_limited(client_ip):
+        return rate_limited_response('60')
+
+    if is_body_too_large():
         return jsonify({
             'success': False,
-            'formatted_response': '❌ Rate Limited\n\nPlease wait 60 seconds before making another request.',
-            'error': 'Rate limit exceeded'
-        }), 429
-    
+            'formatted_response': '❌ Invalid Request\n\nError: Request body too large',
+            'error': 'Payload too large'
+        }), 413
+
     try:
         data = request.get_json()
-        
+
         if not data:
             return jsonify({
                 'success': False,
@@ -93,7 +189,7 @@ def check_account():
             }), 400
         
         # Validate email format
-        if '@' not in email or '.' not in email:
+        if not EMAIL_RE.match(email):
             return jsonify({
                 'success': False,
                 'formatted_response': f'❌ Invalid Email\n\nAccount: {email}\nError: Invalid email format',
@@ -102,14 +198,15 @@ def check_account():
         
         logger.info(f"Checking account: {email}")
         
-        with checker_lock:
-            checker = CrunchyrollChecker()
-            try:
-                result = checker.check_single_account(email, password)
-                return jsonify(result)
-            finally:
-                checker.close()
-                
+        checker = acquire_checker()
+        try:
+            result = checker.check_single_account(email, password)
+        finally:
+            release_checker(checker)
+
+        # Encode the response after the checker is back in the pool
+        return jsonify(result)
+
     except Exception as e:
         logger.error(f"Error checking account: {str(e)}")
         return jsonify({
@@ -127,15 +224,18 @@ def batch_check():
     
     # Stricter rate limiting for batch requests
     if is_rate_limited(client_ip, max_requests=3, window_seconds=120):
+        return rate_limited_response('120')
+
+    if is_body_too_large():
         return jsonify({
             'success': False,
-            'formatted_response': '❌ Rate Limited\n\nPlease wait 2 minutes before making another batch request.',
-            'error': 'Rate limit exceeded'
-        }), 429
-    
+            'formatted_response': '❌ Invalid Request\n\nError: Request body too large',
+            'error': 'Payload too large'
+        }), 413
+
     try:
         data = request.get_json()
-        
+
         if not data or 'accounts' not in data:
             return jsonify({
                 'success': False,
@@ -159,43 +259,38 @@ def batch_check():
                 'error': 'Too many accounts'
             }), 400
         
-        results = []
-        checker = CrunchyrollChecker()
-        
-        try:
-            for i, account_str in enumerate(accounts):
-                if not isinstance(account_str, str) or ':' not in account_str:
-                    results.append(f"❌ Invalid Format\n\nLine {i+1}: {account_str}\nError: Use email:password format")
-                    continue
-                
-                email, password = account_str.split(':', 1)
-                email = email.strip()
-                password = password.strip()
-                
-                # Validate email
-                if '@' not in email or '.' not in email:
-                    results.append(f"❌ Invalid Email\n\nAccount: {email}\nError: Invalid email format")
-                    continue
-                
-                logger.info(f"Batch checking {i+1}/{len(accounts)}: {email}")
-                
-                # Add delay between requests
-                if i > 0:
-                    time.sleep(3)
-                
-                result = checker.check_single_account(email, password)
-                results.append(result['formatted_response'])
-                
-            return jsonify({
-                'success': True,
-                'results': results,
-                'total_checked': len(results),
-                'formatted_response': '\n\n'.join(results)
-            })
-            
-        finally:
-            checker.close()
-            
+        def check_entry(entry):
+            i, account_str = entry
+            if not isinstance(account_str, str) or ':' not in account_str:
+                return f"❌ Invalid Format\n\nLine {i+1}: {account_str}\nError: Use email:password format"
+
+            email, password = account_str.split(':', 1)
+            email = email.strip()
+            password = password.strip()
+
+            # Validate email
+            if not EMAIL_RE.match(email):
+                return f"❌ Invalid Email\n\nAccount: {email}\nError: Invalid email format"
+
+            logger.info(f"Batch checking {i+1}/{len(accounts)}: {email}")
+
+            checker = acquire_checker()
+            try:
+                return checker.check_single_account(email, password)['formatted_response']
+            finally:
+                release_checker(checker)
+
+        # Checks are I/O-bound, so run them concurrently; map preserves order
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results = list(executor.map(check_entry, enumerate(accounts)))
+
+        return jsonify({
+            'success': True,
+            'results': results,
+            'total_checked': len(results),
+            'formatted_response': '\n\n'.join(results)
+        })
+
     except Exception as e:
         logger.error(f"Error in batch check: {str(e)}")
         return jsonify({
@@ -206,18 +301,11 @@ def batch_check():
 
 @app.errorhandler(404)
 def not_found(error):
-    return jsonify({
-        'success': False,
-        'error': 'Endpoint not found',
-        'message': 'Check / for available endpoints'
-    }), 404
+    return Response(_NOT_FOUND_BYTES, status=404, mimetype='application/json')
 
 @app.errorhandler(500)
 def internal_error(error):
-    return jsonify({
-        'success': False,
-        'error': 'Internal server error'
-    }), 500
+    return Response(_SERVER_ERROR_BYTES, status=500, mimetype='application/json')
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
